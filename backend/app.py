@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
 from ml_models_precision_adapter import get_engine
 
@@ -20,14 +21,14 @@ app = FastAPI(title="Krishi AI Backend")
 
 
 @app.get("/health")
-def health():
+async def health():
     return {"status": "ok"}
 
 
 @app.post("/recommend")
-def recommend(payload: FieldData):
+async def recommend(payload: FieldData):
     engine = get_engine()
-    recs, insight = engine.generate_recommendations(payload.model_dump())
+    recs, insight = await run_in_threadpool(engine.generate_recommendations, payload.model_dump())
     return {"recommendations": recs, "insight": insight}
 
 
@@ -5,9 +5,16 @@ from typing import Any, Dict, List, Optional
 
 
 class AgriBlockchain:
+    # Fields covered by a block's hash; everything else (hash, verification_hash) is metadata
+    _FIELDS = ('index', 'timestamp', 'farmer_id', 'crop_data', 'prediction', 'actual', 'error_abs', 'prev_hash', 'nonce')
+
     def __init__(self, difficulty: int = 0):
         self.chain: List[Dict[str, Any]] = []
+        self._by_hash: Dict[str, Dict[str, Any]] = {}
         self.difficulty = int(difficulty)
+        # Running MAPE aggregates over verified blocks, kept in sync by verify_prediction_accuracy
+        self._mape_sum = 0.0
+        self._mape_count = 0
         self.create_genesis_block()
 
     def create_genesis_block(self) -> None:
@@ -26,6 +33,7 @@ class AgriBlockchain:
         }
         genesis['hash'] = self._compute_block_hash(genesis)
         self.chain.append(genesis)
+        self._by_hash[genesis['hash']] = genesis
 
     def add_prediction_record(self, farmer_id: str, crop_data: Dict[str, Any], prediction_result: Dict[str, Any]) -> str:
         prev_block = self.chain[-1]
@@ -45,6 +53,7 @@ class AgriBlockchain:
         else:
             block['hash'] = self._compute_block_hash(block)
         self.chain.append(block)
+        self._by_hash[block['hash']] = block
         return block['hash']
 
     def verify_prediction_accuracy(self, prediction_hash: str, actual_yield: float) -> Dict[str, Any]:
@@ -56,23 +65,24 @@ class AgriBlockchain:
         except Exception:
             return {"error": "prediction_missing"}
 
-        error_abs = abs(float(actual_yield) - predicted)
-        block['actual'] = float(actual_yield)
+        actual = float(actual_yield)
+        error_abs = abs(actual - predicted)
+
+        # Re-verifying a block replaces its previous contribution instead of counting it twice
+        prev_actual = block.get('actual')
+        if prev_actual is not None and float(prev_actual) != 0:
+            self._mape_sum -= abs((float(prev_actual) - predicted) / float(prev_actual))
+            self._mape_count -= 1
+        if actual != 0:
+            self._mape_sum += abs((actual - predicted) / actual)
+            self._mape_count += 1
+
+        block['actual'] = actual
         block['error_abs'] = float(error_abs)
         block['verification_hash'] = self._compute_block_hash(block)
+        self._by_hash[block['verification_hash']] = block
 
-        errors: List[float] = []
-        for b in self.chain[1:]:
-            if b.get('actual') is not None:
-                pred = b['prediction'].get('yield')
-                try:
-                    pred = float(pred)
-                    act = float(b['actual'])
-                    if act != 0:
-                        errors.append(abs((act - pred) / act))
-                except Exception:
-                    continue
-        mape = (sum(errors) / len(errors) * 100.0) if errors else None
+        mape = (self._mape_sum / self._mape_count * 100.0) if self._mape_count else None
 
         return {
             'block_index': block['index'],
@@ -82,36 +92,54 @@ class AgriBlockchain:
         }
 
     def is_chain_valid(self) -> bool:
-        for i in range(1, len(self.chain)):
-            curr = self.chain[i]
-            prev = self.chain[i - 1]
-            if curr['prev_hash'] != prev['hash']:
+        # _compute_block_hash only reads _FIELDS, so blocks can be passed as-is
+        _hash = self._compute_block_hash
+        chain = self.chain
+        target = '0' * self.difficulty
+        for i in range(1, len(chain)):
+            curr = chain[i]
+            if curr['prev_hash'] != chain[i - 1]['hash']:
                 return False
-            if self.difficulty > 0 and not str(curr['hash']).startswith('0' * self.difficulty):
+            if target and not str(curr['hash']).startswith(target):
                 return False
-            if curr['hash'] != self._compute_block_hash({k: v for k, v in curr.items() if k != 'hash'}):
+            if curr['hash'] != _hash(curr):
                 return False
         return True
 
     def _find_block_by_hash(self, h: str) -> Optional[Dict[str, Any]]:
-        for b in self.chain:
-            if b.get('hash') == h:
-                return b
-        return None
+        return self._by_hash.get(h)
 
     def _compute_block_hash(self, block_without_hash: Dict[str, Any]) -> str:
-        data = {k: block_without_hash[k] for k in sorted(block_without_hash.keys()) if k != 'hash'}
-        payload = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
-        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+        payload = self._canonical_json({k: block_without_hash[k] for k in self._FIELDS})
+        return hashlib.sha256(payload).hexdigest()
+
+    def _canonical_json(self, data: Dict[str, Any]) -> bytes:
+        # Always the stdlib encoder: block hashes must not depend on optional packages, and
+        # orjson formats floats differently (1e-7 vs 1e-07) and rejects numpy scalars/int keys.
+        return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
 
     def _mine(self, block: Dict[str, Any]) -> None:
+        # Only the nonce changes while mining: hash the canonical JSON before it once,
+        # then feed just the nonce digits and the fixed remainder on each attempt.
+        head = {k: block[k] for k in self._FIELDS if k < 'nonce'}
+        tail = {k: block[k] for k in self._FIELDS if k > 'nonce'}
+        prefix = self._canonical_json(head)[:-1] + (b',' if head else b'') + b'"nonce":'
+        suffix_bytes = (b',' + self._canonical_json(tail)[1:]) if tail else b'}'
+
+        prefix_hash = hashlib.sha256(prefix)
+        # Compare leading zero nibbles on the raw digest: whole zero bytes, then the
+        # high nibble of the next byte when the difficulty is odd.
+        zero_bytes = self.difficulty // 2
+        zero_prefix = bytes(zero_bytes)
+        odd_nibble = self.difficulty % 2 == 1
         nonce = 0
         while True:
-            block['nonce'] = nonce
-            candidate_hash = self._compute_block_hash(block)
-            if candidate_hash.startswith('0' * self.difficulty):
-                block['hash'] = candidate_hash
+            h = prefix_hash.copy()
+            h.update(str(nonce).encode('ascii'))
+            h.update(suffix_bytes)
+            digest = h.digest()
+            if digest[:zero_bytes] == zero_prefix and (not odd_nibble or digest[zero_bytes] < 0x10):
+                block['nonce'] = nonce
+                block['hash'] = digest.hex()
                 return
             nonce += 1
-
-
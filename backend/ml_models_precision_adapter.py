@@ -35,7 +35,11 @@ class MLEngine:
 
 
 def get_engine():
-    return MLEngine()
+    # One engine per process; it is shared by concurrent requests, so it must stay thread-safe.
+    global _ENGINE_SINGLETON
+    if _ENGINE_SINGLETON is None:
+        _ENGINE_SINGLETON = MLEngine()
+    return _ENGINE_SINGLETON
 
 
 
@@ -1,25 +1,222 @@
+import itertools
 import json
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
-import requests
+import httpx
+import numpy as np
+
+try:  # Optional dependency: C JSON decoder for SHC responses
+    import orjson
+    _HAS_ORJSON = True
+except Exception:  # pragma: no cover
+    orjson = None  # type: ignore
+    _HAS_ORJSON = False
+
+try:  # Optional dependency: JIT for batch scoring; falls back to plain Python loops
+    from numba import njit
+    _HAS_NUMBA = True
+except Exception:  # pragma: no cover
+    _HAS_NUMBA = False
+
+    def njit(*args, **kwargs):  # type: ignore
+        def wrap(fn):
+            return fn
+        return wrap
+
+
+# Pooled HTTP/2 client shared by every SoilIntelligence instance
+# (no custom transport, so HTTP(S)_PROXY and friends from the environment still apply)
+_SESSION = httpx.Client(
+    http2=True,
+    follow_redirects=True,
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+    headers={
+        "Accept": "application/json, text/plain, */*",
+        "User-Agent": "CropIntel/1.0 (+https://example.org)",
+    },
+)
+# Gateway errors are usually transient on these endpoints; retry them a couple of times with backoff
+_RETRY_STATUSES = frozenset({502, 503, 504})
+_MAX_RETRIES = 2
+_RETRY_BACKOFF_SECONDS = 0.25
+
+
+# Rule tables shared by the single-row methods and batch_recommend
+_PH_TARGET_LOW, _PH_TARGET_HIGH = 6.5, 7.5
+_PH_UNKNOWN = {"status": "unknown", "advice": "Test soil pH to plan amendments."}
+# Per-nutrient (name, deficit below, mild deficit below, (mild advice, rate), (deficit advice, rate))
+_NUTRIENT_PLAN = (
+    ("nitrogen", 20.0, 40.0, ("Apply moderate N with topdressing", 50.0), ("Apply urea in split doses", 80.0)),
+    ("phosphorus", 15.0, 25.0, ("Moderate P basal application", 25.0), ("Apply DAP or SSP at sowing", 40.0)),
+    ("potassium", 15.0, 25.0, ("Apply K at early growth", 25.0), ("Apply MOP; avoid leaching", 40.0)),
+)
+_N_LIMITS, _P_LIMITS, _K_LIMITS = ((deficit, mild) for _, deficit, mild, _, _ in _NUTRIENT_PLAN)
+_BALANCED_STEP = {
+    "nutrient": "none",
+    "advice": "Maintain balanced fertilization as per crop schedule",
+    "rate_kg_ha": 0.0,
+}
+
+
+def _nutrient_plan_entry(codes: Tuple[int, int, int]) -> Tuple[str, Tuple[Dict[str, Any], ...]]:
+    steps = []
+    for (name, _, _, mild, deficit), code in zip(_NUTRIENT_PLAN, codes):
+        if code:
+            advice, rate = deficit if code == 2 else mild
+            steps.append({"nutrient": name, "advice": advice, "rate_kg_ha": round(rate, 1)})
+    if 2 in codes:
+        return "deficit", tuple(steps)
+    if 1 in codes:
+        return "mild_deficit", tuple(steps)
+    return "balanced", (_BALANCED_STEP,)
+
+
+# (status, recommendation steps) per N/P/K code triple (0 sufficient, 1 mild, 2 deficit), indexed
+# by 9 * N + 3 * P + K
+_NUTRIENT_PLAN_BY_CODE = tuple(_nutrient_plan_entry(codes) for codes in itertools.product(range(3), repeat=3))
+_ORGANIC_BY_CODE = (
+    {"status": "unknown", "advice": "Incorporate FYM/compost @ 5 t/ha"},
+    {"status": "low", "advice": "Apply compost/FYM @ 8-10 t/ha"},
+    {"status": "moderate", "advice": "Apply compost/FYM @ 5-6 t/ha"},
+    {"status": "good", "advice": "Maintain residues and green manures"},
+)
+_IRRIGATION_BY_CODE = (
+    {"status": "unknown", "schedule": "Irrigate per crop evapotranspiration"},
+    {"status": "dry", "schedule": "Irrigate immediately; mulching recommended"},
+    {"status": "moderate", "schedule": "Irrigate within 2-3 days"},
+    {"status": "adequate", "schedule": "Monitor; no irrigation needed now"},
+)
+# Column order of the array batch_recommend hands to _score ("rainfall_mm" defaults to 0.0)
+_BATCH_INPUTS = ("ph", "nitrogen", "phosphorus", "potassium", "organic_matter", "soil_moisture", "rainfall_mm")
+
+
+@njit(cache=True)
+def _nutrient_code(val, deficit_below, mild_below):
+    # 0 sufficient, 1 mild deficit, 2 deficit (missing values count as deficit)
+    if np.isnan(val) or val < deficit_below:
+        return 2
+    if val < mild_below:
+        return 1
+    return 0
+
+
+@njit(cache=True)
+def _score(data):
+    """Score soil rows laid out as _BATCH_INPUTS; NaN marks a missing value.
+
+    Returns (codes, ph_delta): codes[:, 0] pH (0 unknown, 1 acidic, 2 alkaline, 3 optimal),
+    codes[:, 1] index into _NUTRIENT_PLAN_BY_CODE, codes[:, 2] index into _ORGANIC_BY_CODE,
+    codes[:, 3] index into _IRRIGATION_BY_CODE; ph_delta is the unrounded distance from the
+    target pH band. Thresholds match the single-row methods of SoilIntelligence.
+    """
+    rows = data.shape[0]
+    codes = np.zeros((rows, 4), dtype=np.int8)
+    ph_delta = np.zeros(rows, dtype=np.float64)
+    for i in range(rows):
+        ph = data[i, 0]
+        if np.isnan(ph):
+            codes[i, 0] = 0
+        elif ph < _PH_TARGET_LOW:
+            codes[i, 0] = 1
+            ph_delta[i] = _PH_TARGET_LOW - ph
+        elif ph > _PH_TARGET_HIGH:
+            codes[i, 0] = 2
+            ph_delta[i] = ph - _PH_TARGET_HIGH
+        else:
+            codes[i, 0] = 3
+
+        codes[i, 1] = (
+            9 * _nutrient_code(data[i, 1], _N_LIMITS[0], _N_LIMITS[1])
+            + 3 * _nutrient_code(data[i, 2], _P_LIMITS[0], _P_LIMITS[1])
+            + _nutrient_code(data[i, 3], _K_LIMITS[0], _K_LIMITS[1])
+        )
+
+        om = data[i, 4]
+        if np.isnan(om):
+            codes[i, 2] = 0
+        elif om < 1.0:
+            codes[i, 2] = 1
+        elif om < 2.0:
+            codes[i, 2] = 2
+        else:
+            codes[i, 2] = 3
+
+        sm, rain = data[i, 5], data[i, 6]
+        if np.isnan(sm):
+            codes[i, 3] = 0
+        elif sm < 15:
+            codes[i, 3] = 1
+        elif sm < 25 and (np.isnan(rain) or rain < 5):
+            codes[i, 3] = 2
+        else:
+            codes[i, 3] = 3
+    return codes, ph_delta
 
 
 class SoilIntelligence:
     def __init__(self, timeout_seconds: int = 10):
         self.soil_health_api = "https://soilhealth.dac.gov.in/api"
         self.timeout_seconds = timeout_seconds
-        self.session = requests.Session()
-        self.session.headers.update({
-            "Accept": "application/json, text/plain, */*",
-            "User-Agent": "CropIntel/1.0 (+https://example.org)",
-        })
+        self.session = _SESSION
 
     def get_soil_recommendations(self, location_data: Dict[str, Any]) -> Dict[str, Any]:
         """Integrate with Soil Health Card Portal data and produce recommendations."""
         soil_metrics = self.fetch_soil_data(location_data)
+        return self._recommend_from_metrics(soil_metrics)
+
+    def batch_recommend(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Score many already-fetched soil metric rows at once.
+
+        Produces the same per-row output as get_soil_recommendations without fetching (missing,
+        unparseable and NaN values are all treated as missing, as _to_float does); the numeric
+        rules run in a single compiled kernel and dicts are only built for the result.
+        """
+        if not rows:
+            return []
+        if not _HAS_NUMBA:
+            # Interpreted, the kernel loses to the scalar rules; it only pays off compiled
+            return [self._recommend_from_metrics(r) for r in rows]
+
+        # Raw values in _BATCH_INPUTS order
+        raw = [
+            (r.get("ph"), r.get("nitrogen"), r.get("phosphorus"), r.get("potassium"),
+             r.get("organic_matter"), r.get("soil_moisture"), r.get("rainfall_mm", 0.0))
+            for r in rows
+        ]
+        try:
+            # One conversion for the whole batch: None becomes NaN, numeric strings parse
+            data = np.array(raw, dtype=np.float64)
+        except (TypeError, ValueError):
+            # Some value float() rejects: convert column by column, and cell by cell only in the
+            # columns that need it (unparseable values become missing)
+            data = np.empty((len(rows), len(_BATCH_INPUTS)), dtype=np.float64)
+            for j, col in enumerate(zip(*raw)):
+                try:
+                    data[:, j] = np.array(col, dtype=np.float64)
+                except (TypeError, ValueError):
+                    data[:, j] = [self._as_nan(v) for v in col]
+        codes, ph_delta = _score(data)
+
+        # Column lists rather than one list per row keep the per-row loop allocation-light
+        ph_codes, plan_codes, om_codes, irr_codes = codes.T.tolist()
+        ph_from_code, plan_from_code = self._ph_from_code, self._nutrient_plan_from_code
+        return [
+            {
+                "ph_adjustment": ph_from_code(ph_c, delta),
+                "nutrient_plan": plan_from_code(plan_c),
+                "organic_matter": _ORGANIC_BY_CODE[om_c].copy(),
+                "irrigation_schedule": _IRRIGATION_BY_CODE[irr_c].copy(),
+                "source": row.get("_source", "soil_health_card"),
+            }
+            for row, ph_c, delta, plan_c, om_c, irr_c in zip(
+                rows, ph_codes, ph_delta.tolist(), plan_codes, om_codes, irr_codes
+            )
+        ]
 
+    def _recommend_from_metrics(self, soil_metrics: Dict[str, Any]) -> Dict[str, Any]:
         ph_val = self._to_float(soil_metrics.get("ph"))
-        recommendations = {
+        return {
             "ph_adjustment": self.calculate_ph_needs(ph_val),
             "nutrient_plan": self.generate_nutrient_plan(soil_metrics),
             "organic_matter": self.assess_organic_content(soil_metrics),
@@ -27,8 +224,6 @@ class SoilIntelligence:
             "source": soil_metrics.get("_source", "soil_health_card"),
         }
 
-        return recommendations
-
     # ---------------------------- Integration ---------------------------- #
     def fetch_soil_data(self, location_data: Dict[str, Any]) -> Dict[str, Any]:
         """Fetch soil metrics for a given location and normalize the schema.
@@ -68,98 +263,84 @@ class SoilIntelligence:
 
     # ------------------------- Recommendation logic ---------------------- #
     def calculate_ph_needs(self, ph_val: Optional[float]) -> Dict[str, Any]:
-        target_low, target_high = 6.5, 7.5
-        if ph_val is None:
-            return {"status": "unknown", "advice": "Test soil pH to plan amendments."}
-        if ph_val < target_low:
-            delta = round(target_low - ph_val, 2)
-            return {
-                "status": "acidic",
-                "delta": delta,
-                "amendment": "agricultural_lime",
-                "rate_hint_t_ha": round(1.5 * delta, 2),
-            }
-        if ph_val > target_high:
-            delta = round(ph_val - target_high, 2)
-            return {
-                "status": "alkaline",
-                "delta": delta,
-                "amendment": "elemental_sulfur_or_gypsum",
-                "rate_hint_t_ha": round(0.8 * delta, 2),
-            }
-        return {"status": "optimal"}
+        if ph_val is None or ph_val != ph_val:
+            return self._ph_from_code(0, 0.0)
+        if ph_val < _PH_TARGET_LOW:
+            return self._ph_from_code(1, _PH_TARGET_LOW - ph_val)
+        if ph_val > _PH_TARGET_HIGH:
+            return self._ph_from_code(2, ph_val - _PH_TARGET_HIGH)
+        return self._ph_from_code(3, 0.0)
 
     def generate_nutrient_plan(self, soil_metrics: Dict[str, Any]) -> Dict[str, Any]:
-        n = self._to_float(soil_metrics.get("nitrogen"))
-        p = self._to_float(soil_metrics.get("phosphorus"))
-        k = self._to_float(soil_metrics.get("potassium"))
-
-        plan: Dict[str, Any] = {"status": "balanced", "recommendations": []}
-
-        def add(name: str, advice: str, rate_kg_ha: float) -> None:
-            plan["recommendations"].append({
-                "nutrient": name,
-                "advice": advice,
-                "rate_kg_ha": round(rate_kg_ha, 1),
-            })
-
-        if n is None or n < 20:
-            add("nitrogen", "Apply urea in split doses", 80.0)
-            plan["status"] = "deficit"
-        elif n < 40:
-            add("nitrogen", "Apply moderate N with topdressing", 50.0)
-            plan["status"] = "mild_deficit"
-
-        if p is None or p < 15:
-            add("phosphorus", "Apply DAP or SSP at sowing", 40.0)
-            plan["status"] = "deficit"
-        elif p < 25:
-            add("phosphorus", "Moderate P basal application", 25.0)
-            if plan["status"] == "balanced":
-                plan["status"] = "mild_deficit"
-
-        if k is None or k < 15:
-            add("potassium", "Apply MOP; avoid leaching", 40.0)
-            plan["status"] = "deficit"
-        elif k < 25:
-            add("potassium", "Apply K at early growth", 25.0)
-            if plan["status"] == "balanced":
-                plan["status"] = "mild_deficit"
-
-        if not plan["recommendations"]:
-            plan["recommendations"].append({
-                "nutrient": "none",
-                "advice": "Maintain balanced fertilization as per crop schedule",
-                "rate_kg_ha": 0.0,
-            })
-
-        return plan
+        plan_code = 0
+        for name, deficit_below, mild_below, _, _ in _NUTRIENT_PLAN:
+            val = self._to_float(soil_metrics.get(name))
+            plan_code = 3 * plan_code + (2 if val is None or val < deficit_below else 1 if val < mild_below else 0)
+        return self._nutrient_plan_from_code(plan_code)
 
     def assess_organic_content(self, soil_metrics: Dict[str, Any]) -> Dict[str, Any]:
         om = self._to_float(soil_metrics.get("organic_matter"))
         if om is None:
-            return {"status": "unknown", "advice": "Incorporate FYM/compost @ 5 t/ha"}
+            return _ORGANIC_BY_CODE[0].copy()
         if om < 1.0:
-            return {"status": "low", "advice": "Apply compost/FYM @ 8-10 t/ha"}
+            return _ORGANIC_BY_CODE[1].copy()
         if om < 2.0:
-            return {"status": "moderate", "advice": "Apply compost/FYM @ 5-6 t/ha"}
-        return {"status": "good", "advice": "Maintain residues and green manures"}
+            return _ORGANIC_BY_CODE[2].copy()
+        return _ORGANIC_BY_CODE[3].copy()
 
     def optimize_irrigation(self, soil_metrics: Dict[str, Any]) -> Dict[str, Any]:
         sm = self._to_float(soil_metrics.get("soil_moisture"))
         rainfall = self._to_float(soil_metrics.get("rainfall_mm", 0.0))
         if sm is None:
-            return {"status": "unknown", "schedule": "Irrigate per crop evapotranspiration"}
+            return _IRRIGATION_BY_CODE[0].copy()
         if sm < 15:
-            return {"status": "dry", "schedule": "Irrigate immediately; mulching recommended"}
+            return _IRRIGATION_BY_CODE[1].copy()
         if sm < 25 and (rainfall is None or rainfall < 5):
-            return {"status": "moderate", "schedule": "Irrigate within 2-3 days"}
-        return {"status": "adequate", "schedule": "Monitor; no irrigation needed now"}
+            return _IRRIGATION_BY_CODE[2].copy()
+        return _IRRIGATION_BY_CODE[3].copy()
 
     # ------------------------------ Utils -------------------------------- #
+    def _ph_from_code(self, code: int, raw_delta: float) -> Dict[str, Any]:
+        if code == 0:
+            return dict(_PH_UNKNOWN)
+        if code == 3:
+            return {"status": "optimal"}
+        delta = round(raw_delta, 2)
+        if code == 1:
+            return {
+                "status": "acidic",
+                "delta": delta,
+                "amendment": "agricultural_lime",
+                "rate_hint_t_ha": round(1.5 * delta, 2),
+            }
+        return {
+            "status": "alkaline",
+            "delta": delta,
+            "amendment": "elemental_sulfur_or_gypsum",
+            "rate_hint_t_ha": round(0.8 * delta, 2),
+        }
+
+    def _nutrient_plan_from_code(self, plan_code: int) -> Dict[str, Any]:
+        status, steps = _NUTRIENT_PLAN_BY_CODE[plan_code]
+        return {"status": status, "recommendations": [step.copy() for step in steps]}
+
     def _request_json(self, url: str) -> Any:
-        resp = self.session.get(url, timeout=self.timeout_seconds)
+        for attempt in range(_MAX_RETRIES + 1):
+            try:
+                resp = self.session.get(url, timeout=self.timeout_seconds)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                if attempt == _MAX_RETRIES:
+                    raise
+            else:
+                if resp.status_code not in _RETRY_STATUSES or attempt == _MAX_RETRIES:
+                    break
+            time.sleep(_RETRY_BACKOFF_SECONDS * (2 ** attempt))
         resp.raise_for_status()
+        if _HAS_ORJSON:
+            try:
+                return orjson.loads(resp.content)
+            except ValueError:
+                pass
         try:
             return resp.json()
         except ValueError:
@@ -169,8 +350,14 @@ class SoilIntelligence:
         if val is None:
             return None
         try:
-            return float(val)
+            f = float(val)
         except Exception:
             return None
+        # NaN means "no reading", the same as a missing key
+        return None if f != f else f
+
+    def _as_nan(self, val: Optional[Any]) -> float:
+        f = self._to_float(val)
+        return np.nan if f is None else f
 
 
@@ -1,37 +1,82 @@
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote_plus
 
-import requests
+import httpx
+import numpy as np
+
+try:  # Optional dependency: faster JSON decoding straight from response bytes
+    import orjson
+    _HAS_ORJSON = True
+except Exception:  # pragma: no cover
+    orjson = None  # type: ignore
+    _HAS_ORJSON = False
+
+try:  # Optional dependency: C fast path for ISO-8601 timestamps
+    from ciso8601 import parse_datetime as _parse_iso
+    _HAS_CISO8601 = True
+except Exception:  # pragma: no cover
+    _parse_iso = None  # type: ignore
+    _HAS_CISO8601 = False
+
+
+# Shared across instances so TCP/TLS connections (and HTTP/2 streams) are reused between calls
+# (no custom transport, so HTTP(S)_PROXY and friends from the environment still apply)
+_SESSION = httpx.Client(
+    http2=True,
+    follow_redirects=True,
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+    headers={
+        "Accept": "application/json, text/plain, */*",
+        "User-Agent": "CropIntel/1.0 (+https://example.org)",
+    },
+)
+# Gateway errors are usually transient on these endpoints; retry them a couple of times with backoff
+_RETRY_STATUSES = frozenset({502, 503, 504})
+_MAX_RETRIES = 2
+_RETRY_BACKOFF_SECONDS = 0.25
+
+# The IMD endpoints are fetched concurrently. One pool serves all instances, sized like the
+# connection pool so concurrent requests' fetches don't queue behind each other.
+_EXECUTOR = ThreadPoolExecutor(max_workers=32, thread_name_prefix="imd-fetch")
 
 
 class WeatherService:
+    _URL_TMPL = {
+        "current": "{base}/current_wx_api.php?id={id}",
+        "forecast": "{base}/cityweather.php?id={id}",
+        "rainfall": "{base}/districtwise_rainfall_api.php",
+    }
+
     def __init__(self, timeout_seconds: int = 10):
         self.imd_base_url = "https://mausam.imd.gov.in/api"
         self.timeout_seconds = timeout_seconds
-        self.session = requests.Session()
-        self.session.headers.update({
-            "Accept": "application/json, text/plain, */*",
-            "User-Agent": "CropIntel/1.0 (+https://example.org)"
-        })
+        self.session = _SESSION
 
     def get_district_weather(self, district_code: str) -> Dict[str, Any]:
         """Integrate with IMD APIs for Odisha districts.
 
         Returns a processed dict with keys: current, forecast, rainfall, and derived fields.
         """
+        district_id = quote_plus(str(district_code))
         endpoints = {
-            "current": f"{self.imd_base_url}/current_wx_api.php?id={district_code}",
-            "forecast": f"{self.imd_base_url}/cityweather.php?id={district_code}",
-            "rainfall": f"{self.imd_base_url}/districtwise_rainfall_api.php",
+            key: tmpl.format(base=self.imd_base_url, id=district_id)
+            for key, tmpl in self._URL_TMPL.items()
         }
 
+        futures = {key: _EXECUTOR.submit(self._request_json, url) for key, url in endpoints.items()}
         raw: Dict[str, Any] = {}
-        for key, url in endpoints.items():
+        for key, future in futures.items():
             try:
-                raw[key] = self._request_json(url)
+                # No wait timeout here: the HTTP client's own timeout bounds the fetch, and time
+                # spent queued for a worker must not count as the endpoint being slow
+                raw[key] = future.result()
             except Exception as exc:  # pragma: no cover - network variability
-                raw[key] = {"error": str(exc), "_source_url": url}
+                raw[key] = {"error": f"{type(exc).__name__}: {exc}", "_source_url": endpoints[key]}
 
         return self.process_weather_data(raw)
 
@@ -72,34 +117,34 @@ class WeatherService:
         if base_temp_c is None:
             base_temp_c = self._crop_base_temp(crop)
 
-        gdd_total = 0.0
-        for d in temp_data:
-            tmin = self._safe_get(d, ["min_temp_c", "tmin", "min"])
-            tmax = self._safe_get(d, ["max_temp_c", "tmax", "max"])
-            if tmin is None or tmax is None:
-                # Try to derive from current object shape
-                t = self._safe_get(d, ["temp_c", "temperature", "temp"])
-                if t is None:
-                    continue
-                tmin = float(t)
-                tmax = float(t)
-
-            tmin = float(tmin)
-            tmax = float(tmax)
+        tmin, tmax = self._extract_tminmax(temp_data)
 
-            # Apply caps as per standard single-sine approximation shortcut
-            tmax_capped = min(tmax, float(upper_temp_c) if upper_temp_c is not None else tmax)
-            tmean = (tmax_capped + tmin) / 2.0
-            gdd_day = max(0.0, tmean - float(base_temp_c))
-            gdd_total += gdd_day
+        # Apply caps as per standard single-sine approximation shortcut
+        if upper_temp_c is not None:
+            tmax = np.minimum(tmax, float(upper_temp_c))
+        gdd_total = np.maximum(0.0, (tmax + tmin) / 2.0 - float(base_temp_c)).sum()
 
-        return round(gdd_total, 2)
+        return round(float(gdd_total), 2)
 
     # --------------------------- Internal helpers --------------------------- #
     def _request_json(self, url: str) -> Any:
-        resp = self.session.get(url, timeout=self.timeout_seconds)
+        for attempt in range(_MAX_RETRIES + 1):
+            try:
+                resp = self.session.get(url, timeout=self.timeout_seconds)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                if attempt == _MAX_RETRIES:
+                    raise
+            else:
+                if resp.status_code not in _RETRY_STATUSES or attempt == _MAX_RETRIES:
+                    break
+            time.sleep(_RETRY_BACKOFF_SECONDS * (2 ** attempt))
         resp.raise_for_status()
         # Some IMD endpoints may return text/plain JSON
+        if _HAS_ORJSON:
+            try:
+                return orjson.loads(resp.content)
+            except ValueError:
+                pass
         try:
             return resp.json()
         except ValueError:
@@ -162,7 +207,28 @@ class WeatherService:
             })
         return out
 
+    def _extract_tminmax(self, temp_data: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        tmins: List[float] = []
+        tmaxs: List[float] = []
+        for d in temp_data:
+            tmin = self._safe_get(d, ["min_temp_c", "tmin", "min"])
+            tmax = self._safe_get(d, ["max_temp_c", "tmax", "max"])
+            if tmin is None or tmax is None:
+                # Try to derive from current object shape
+                t = self._safe_get(d, ["temp_c", "temperature", "temp"])
+                if t is None:
+                    continue
+                tmin = tmax = t
+            tmins.append(float(tmin))
+            tmaxs.append(float(tmax))
+        return np.asarray(tmins, dtype=np.float64), np.asarray(tmaxs, dtype=np.float64)
+
     def _crop_base_temp(self, crop: Optional[str]) -> float:
+        return self._crop_base_temp_cached(crop)
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _crop_base_temp_cached(crop: Optional[str]) -> float:
         if not crop:
             return 10.0
         name = crop.strip().lower()
@@ -203,8 +269,18 @@ class WeatherService:
             except Exception:
                 return None
         if isinstance(val, str):
-            # Try common IMD/ISO formats
-            for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%d-%m-%Y %H:%M:%S", "%d-%m-%Y"):
+            if _HAS_CISO8601:
+                try:
+                    return _parse_iso(val).isoformat()
+                except Exception:
+                    pass
+            # Common IMD/ISO formats, most likely first given the string's shape (year-first when
+            # four digits lead into a '-'); the other order is still tried before giving up
+            timed = " " in val
+            ymd = "%Y-%m-%d %H:%M:%S" if timed else "%Y-%m-%d"
+            dmy = "%d-%m-%Y %H:%M:%S" if timed else "%d-%m-%Y"
+            fmts = (ymd, dmy) if val[:4].isdigit() and val[4:5] == "-" else (dmy, ymd)
+            for fmt in fmts:
                 try:
                     return datetime.strptime(val, fmt).isoformat()
                 except Exception:
@@ -1,4 +1,9 @@
+import itertools
 import json
+import os
+import pickle
+import re
+import warnings
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple, Union
 
@@ -12,10 +17,116 @@ except Exception:  # pragma: no cover - optional dependency
     LGBMRegressor = None  # type: ignore
     _HAS_LGBM = False
 
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_squared_error
-from sklearn.model_selection import train_test_split
+try:
+    from numba import njit  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+
+    def njit(*args, **kwargs):  # type: ignore
+        def wrap(fn):
+            return fn
+        return wrap
+
+try:
+    import lz4  # type: ignore  # noqa: F401
+    _HAS_LZ4 = True
+except Exception:  # pragma: no cover - optional dependency
+    _HAS_LZ4 = False
+
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
 import joblib
+from joblib import Parallel, delayed
+
+
+# Risk inputs in kernel column order: (raw key, prefixed fallback key, default)
+_RISK_INPUTS = (
+    ("rainfall", "w_rainfall", 0.0),
+    ("temperature", "w_temperature", 0.0),
+    ("humidity", "w_humidity", 50.0),
+    ("soil_moisture", "s_soil_moisture", 0.0),
+    ("nitrogen", "s_nitrogen", 0.0),
+    ("phosphorus", "s_phosphorus", 0.0),
+    ("potassium", "s_potassium", 0.0),
+    ("ph", "s_ph", 7.0),
+)
+# Label for each bit of the _risk_bitmask output
+_RISK_LABELS = (
+    "low_rainfall", "heat_stress", "low_humidity", "dry_soil",
+    "nitrogen_deficit", "phosphorus_deficit", "potassium_deficit", "unfavorable_ph",
+)
+
+# Interaction features as (name, weather column, soil column), built when both inputs exist
+_INTERACTIONS = (
+    ("int_rainfall_soil_moisture", "w_rainfall", "s_soil_moisture"),
+    ("int_temp_organic", "w_temperature", "s_organic_matter"),
+)
+
+
+# Serial on purpose: the kernel is called from FastAPI worker threads, and parallel kernels
+# launched from several threads leave numba's TBB pool hanging at interpreter exit.
+# Thresholds mirror CropYieldPredictor.identify_risks, which stays in plain Python for single rows.
+@njit(cache=True)
+def _risk_bitmask(arr):
+    """Threshold an (N, 8) array laid out as _RISK_INPUTS into one bit per _RISK_LABELS entry."""
+    n = arr.shape[0]
+    out = np.zeros(n, dtype=np.uint16)
+    for i in range(n):
+        bits = 0
+        if arr[i, 0] < 50:
+            bits |= 1
+        if arr[i, 1] > 35:
+            bits |= 2
+        if arr[i, 2] < 30:
+            bits |= 4
+        if arr[i, 3] < 20:
+            bits |= 8
+        if arr[i, 4] < 20:
+            bits |= 16
+        if arr[i, 5] < 15:
+            bits |= 32
+        if arr[i, 6] < 15:
+            bits |= 64
+        if arr[i, 7] < 5.5 or arr[i, 7] > 8.0:
+            bits |= 128
+        out[i] = bits
+    return out
+
+
+def _train_one(crop_name: str, crop_df: pd.DataFrame, target_name: str, model) -> Optional[Tuple[str, object, List[str], float, int]]:
+    """Fit one crop's model; runs in a joblib worker. Returns None when there is too little data."""
+    X = crop_df.drop(columns=["crop", target_name])
+    y = crop_df[target_name]
+
+    if len(X) < 10:
+        # Too little data to train a stable model
+        return None
+
+    if getattr(model, "oob_score", False):
+        # Out-of-bag predictions give a held-out residual estimate while fitting on every row
+        model.fit(X, y)
+        residuals = y.to_numpy(dtype=float) - model.oob_prediction_
+        rmse = float(np.sqrt(np.nanmean(residuals ** 2)))
+    else:
+        # Same 80/20 rows as train_test_split(test_size=0.2, random_state=42), but fitted on
+        # NumPy arrays indexed in place instead of four copied DataFrames
+        arr_X = X.to_numpy(dtype=np.float64)
+        arr_y = y.to_numpy(dtype=np.float64)
+        perm = np.random.RandomState(42).permutation(len(arr_X))
+        n_val = int(np.ceil(0.2 * len(arr_X)))
+        train_idx, val_idx = perm[n_val:], perm[:n_val]
+
+        model.fit(arr_X[train_idx], arr_y[train_idx])
+
+        # Residual std estimated on validation
+        residuals = arr_y[val_idx] - model.predict(arr_X[val_idx])
+        rmse = np.sqrt(np.mean(residuals ** 2))
+    return crop_name, model, list(X.columns), float(rmse), int(len(X))
+
+# Crops with fewer training rows use RandomForest instead of HistGradientBoosting in the
+# non-LGBM fallback; below this, boosting's leaf-size limits leave trees that barely split
+_HGB_MIN_ROWS = 200
+
+# Process-wide source of CropYieldPredictor.state_version values
+_STATE_VERSIONS = itertools.count()
 
 
 @dataclass
@@ -45,6 +156,16 @@ class CropYieldPredictor:
     def __init__(self, target_name: str = "yield") -> None:
         self.target_name = target_name
         self.models: Dict[str, TrainedCropModel] = {}
+        # Prediction-time feature template captured at training (see _fit_feature_template)
+        self._w_cols: Optional[List[str]] = None
+        self._s_cols: Optional[List[str]] = None
+        self._w_medians: Optional[np.ndarray] = None
+        self._s_medians: Optional[np.ndarray] = None
+        self._interactions: List[Tuple[str, str, str]] = []
+        self._col_index: Optional[Dict[str, int]] = None
+        # Unique across predictors; changes whenever models/template are replaced, so callers
+        # caching predictions can key on it
+        self.state_version = next(_STATE_VERSIONS)
 
     # ----------------------------- Public API ----------------------------- #
     def train_hybrid_model(
@@ -56,7 +177,7 @@ class CropYieldPredictor:
         """Train per-crop models and store internal state.
 
         The method builds features, merges target, splits by crop, and trains a model per crop.
-        LGBM is preferred if available; otherwise RandomForest is used.
+        LGBM is preferred if available; otherwise HistGradientBoosting is used (RandomForest for wheat).
         """
         features = self.feature_engineering(weather_data, soil_data)
 
@@ -68,40 +189,43 @@ class CropYieldPredictor:
         if "crop" not in data.columns:
             raise ValueError("'crop' column is required in yield_data for per-crop training")
 
-        # Train per crop
+        # Split by crop with one stable sort instead of a GroupBy: each crop is then a contiguous
+        # slice (same keys, row order and NaN-dropping as groupby)
+        codes, crop_names = pd.factorize(data["crop"], sort=True)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(crop_names) + 1))
+        sorted_data = data.iloc[order]
+
+        # Train per crop; crops are independent, so fit them in parallel worker processes
+        results = Parallel(n_jobs=-1, backend="loky", batch_size=1)(
+            delayed(_train_one)(
+                crop_name,
+                sorted_data.iloc[bounds[k]:bounds[k + 1]],
+                self.target_name,
+                self._build_crop_model(crop_name, int(bounds[k + 1] - bounds[k])),
+            )
+            for k, crop_name in enumerate(crop_names)
+        )
         models: Dict[str, TrainedCropModel] = {}
-        for crop_name, crop_df in data.groupby("crop"):
-            X = crop_df.drop(columns=["crop", self.target_name])
-            y = crop_df[self.target_name]
-
-            if len(X) < 10:
-                # Too little data to train a stable model
+        for result in results:
+            if result is None:
                 continue
-
-            X_train, X_val, y_train, y_val = train_test_split(
-                X, y, test_size=0.2, random_state=42
-            )
-
-            model = self._build_crop_model(crop_name)
-            model.fit(X_train, y_train)
-
-            # Residual std estimated on validation
-            y_pred_val = model.predict(X_val)
-            rmse = mean_squared_error(y_val, y_pred_val, squared=False)
-
+            crop_name, model, feature_columns, rmse, training_rows = result
             models[crop_name] = TrainedCropModel(
                 model_name=type(model).__name__,
                 model=model,
-                feature_columns=list(X.columns),
+                feature_columns=feature_columns,
                 target_name=self.target_name,
-                residual_std=float(rmse),
-                training_rows=int(len(X)),
+                residual_std=rmse,
+                training_rows=training_rows,
             )
 
         if not models:
             raise ValueError("No crop models were trained; provide more data.")
 
         self.models = models
+        self._fit_feature_template(features)
+        self.state_version = next(_STATE_VERSIONS)
         return models
 
     def predict_with_confidence(
@@ -118,37 +242,46 @@ class CropYieldPredictor:
             raise ValueError("Input must include a 'crop' column for per-crop prediction")
 
         # Build features using input_data for both weather and soil placeholders.
-        # feature_engineering will select intersecting columns.
-        features = self.feature_engineering(input_data, input_data)
-
-        results: List[Dict[str, Union[str, float, List[str], Tuple[float, float]]]] = []
-        for idx, row in input_data.iterrows():
-            crop_name = str(row["crop"]).lower()
+        if self._w_cols is not None:
+            X, col_index = self._feature_engineering_predict(input_data)
+            features = None
+        else:
+            # Predictors saved before the feature template existed
+            features = self.feature_engineering(input_data, input_data)
+
+        # Predict each crop's rows in one call, then place results back in input order
+        risks = self._identify_risks_batch(input_data)
+        crop_keys = input_data["crop"].astype(str).str.lower()
+        results: List[Dict[str, Union[str, float, List[str], Tuple[float, float]]]] = [{} for _ in risks]
+        for crop_name, positions in crop_keys.groupby(crop_keys.to_numpy(), sort=False).indices.items():
             if crop_name not in self.models:
-                results.append({
-                    "crop": crop_name,
-                    "yield": float("nan"),
-                    "confidence_score": 0.0,
-                    "interval": (float("nan"), float("nan")),
-                    "risk_factors": ["unseen_crop_model"]
-                })
+                for pos in positions:
+                    results[pos] = {
+                        "crop": crop_name,
+                        "yield": float("nan"),
+                        "confidence_score": 0.0,
+                        "interval": (float("nan"), float("nan")),
+                        "risk_factors": ["unseen_crop_model"]
+                    }
                 continue
 
             trained = self.models[crop_name]
             # Align feature columns
-            X_row = self._safe_feature_row(features.loc[[idx]], trained.feature_columns)
-            pred = float(trained.model.predict(X_row)[0])
-
-            low, high, score = self._confidence_interval(pred, trained.residual_std)
-            risks = self.identify_risks(row.to_dict())
+            if features is None:
+                X_block = self._template_block(X[positions], col_index, trained.feature_columns, trained.model)
+            else:
+                X_block = self._safe_feature_row(features.iloc[positions], trained.feature_columns, trained.model)
+            preds = np.asarray(trained.model.predict(X_block), dtype=float)
+            low, high, score = self._confidence_interval(preds, trained.residual_std)
 
-            results.append({
-                "crop": crop_name,
-                "yield": pred,
-                "confidence_score": score,
-                "interval": (low, high),
-                "risk_factors": risks,
-            })
+            for j, pos in enumerate(positions):
+                results[pos] = {
+                    "crop": crop_name,
+                    "yield": float(preds[j]),
+                    "confidence_score": float(score[j]),
+                    "interval": (float(low[j]), float(high[j])),
+                    "risk_factors": risks[pos],
+                }
 
         if len(results) == 1:
             single = results[0].copy()
@@ -156,6 +289,39 @@ class CropYieldPredictor:
             return single
         return results
 
+    def predict_from_dict(
+        self, row: Dict[str, Union[str, float, int, None]]
+    ) -> Dict[str, Union[float, List[str], Tuple[float, float]]]:
+        """Predict a single row given as a plain dict, without building a DataFrame.
+
+        Returns the same dict as predict_with_confidence does for a one-row input.
+        """
+        if "crop" not in row:
+            raise ValueError("Input must include a 'crop' column for per-crop prediction")
+        if self._w_cols is None:
+            # Predictors saved before the feature template existed
+            return self.predict_with_confidence(pd.DataFrame([row]))  # type: ignore[return-value]
+
+        crop_name = str(row["crop"]).lower()
+        if crop_name not in self.models:
+            return {
+                "yield": float("nan"),
+                "confidence_score": 0.0,
+                "interval": (float("nan"), float("nan")),
+                "risk_factors": ["unseen_crop_model"]
+            }
+
+        trained = self.models[crop_name]
+        X, col_index = self._feature_vector(row)
+        pred = float(trained.model.predict(self._template_block(X, col_index, trained.feature_columns, trained.model))[0])
+        low, high, score = self._confidence_interval(np.array([pred]), trained.residual_std)
+        return {
+            "yield": pred,
+            "confidence_score": float(score[0]),
+            "interval": (float(low[0]), float(high[0])),
+            "risk_factors": self.identify_risks(row),
+        }
+
     # --------------------------- Helper methods -------------------------- #
     def feature_engineering(
         self, weather_data: pd.DataFrame, soil_data: pd.DataFrame
@@ -166,8 +332,9 @@ class CropYieldPredictor:
         - Selects numeric columns only, with safe fillna.
         - Adds simple interaction features.
         """
-        w = weather_data.copy()
-        s = soil_data.copy()
+        # No defensive copies: set_index/loc below return new frames and inputs are never mutated
+        w = weather_data
+        s = soil_data
 
         key_col = None
         if "id" in w.columns and "id" in s.columns:
@@ -181,29 +348,23 @@ class CropYieldPredictor:
             w = w.loc[common_index]
             s = s.loc[common_index]
 
-        # Numeric selection
-        w_num = w.select_dtypes(include=[np.number])
-        s_num = s.select_dtypes(include=[np.number])
-
-        # Basic cleaning
-        w_num = w_num.replace([np.inf, -np.inf], np.nan).fillna(w_num.median(numeric_only=True))
-        s_num = s_num.replace([np.inf, -np.inf], np.nan).fillna(s_num.median(numeric_only=True))
+        # Numeric selection, cleaning, and prefixing to avoid collisions
+        w_arr, w_cols = self._clean_numeric(w, "w_")
+        s_arr, s_cols = self._clean_numeric(s, "s_")
+        cols = w_cols + s_cols
+        col_pos = {c: i for i, c in enumerate(cols)}
 
-        # Rename columns to avoid collisions
-        w_num = w_num.add_prefix("w_")
-        s_num = s_num.add_prefix("s_")
+        # Simple interactions if columns are present, written into the same block as the inputs
+        interactions = [t for t in _INTERACTIONS if t[1] in col_pos and t[2] in col_pos]
+        n_w, n_base = len(w_cols), len(cols)
+        arr = np.empty((len(w_arr), n_base + len(interactions)), dtype=np.float64)
+        arr[:, :n_w] = w_arr
+        arr[:, n_w:n_base] = s_arr
+        for k, (name, w_col, s_col) in enumerate(interactions):
+            arr[:, n_base + k] = arr[:, col_pos[w_col]] * arr[:, col_pos[s_col]]
+            cols.append(name)
 
-        features = pd.concat([w_num, s_num], axis=1)
-
-        # Simple interactions if columns are present
-        if "w_rainfall" in features.columns and "s_soil_moisture" in features.columns:
-            features["int_rainfall_soil_moisture"] = (
-                features["w_rainfall"].astype(float) * features["s_soil_moisture"].astype(float)
-            )
-        if "w_temperature" in features.columns and "s_organic_matter" in features.columns:
-            features["int_temp_organic"] = (
-                features["w_temperature"].astype(float) * features["s_organic_matter"].astype(float)
-            )
+        features = pd.DataFrame(arr, index=w.index, columns=cols, copy=False)
 
         # Optionally restore id as column (not needed for model)
         if key_col is not None:
@@ -211,13 +372,82 @@ class CropYieldPredictor:
 
         return features
 
+    def _clean_numeric(self, df: pd.DataFrame, prefix: str) -> Tuple[np.ndarray, List[str]]:
+        """Numeric columns of `df` as one float64 array with non-finite values set to column medians.
+
+        Returns the array and the prefixed column names.
+        """
+        num = df.select_dtypes(include=[np.number])
+        arr = num.to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+        with warnings.catch_warnings():
+            # All-NaN columns stay NaN, as with DataFrame.median
+            warnings.simplefilter("ignore", RuntimeWarning)
+            # Medians include +/-inf values, matching the previous fillna(df.median()) order
+            medians = np.nanmedian(arr, axis=0) if len(arr) else np.full(arr.shape[1], np.nan)
+        rows, cols = np.nonzero(~np.isfinite(arr))
+        arr[rows, cols] = medians[cols]
+        return arr, [f"{prefix}{c}" for c in num.columns]
+
+    def _fit_feature_template(self, features: pd.DataFrame) -> None:
+        """Record training column order and medians so prediction can skip feature_engineering."""
+        self._w_cols = [c[2:] for c in features.columns if c.startswith("w_")]
+        self._s_cols = [c[2:] for c in features.columns if c.startswith("s_")]
+        # Training features are already median-filled, which leaves the medians unchanged
+        self._w_medians = features[[f"w_{c}" for c in self._w_cols]].median().to_numpy(dtype=np.float64)
+        self._s_medians = features[[f"s_{c}" for c in self._s_cols]].median().to_numpy(dtype=np.float64)
+        self._interactions = [t for t in _INTERACTIONS if t[0] in features.columns]
+        self._col_index = None
+
+    def _feature_engineering_predict(self, df: pd.DataFrame) -> Tuple[np.ndarray, Dict[str, int]]:
+        """Prediction-path feature_engineering using the training template.
+
+        Reads the training columns straight from `df`, replaces missing/non-finite values with
+        training medians and appends the interaction columns. Returns the array and a
+        column -> position map.
+        """
+        n_w, n_s = len(self._w_cols), len(self._s_cols)
+        X = np.empty((len(df), n_w + n_s + len(self._interactions)), dtype=np.float64)
+        X[:, :n_w] = self._numeric_block(df, self._w_cols)
+        X[:, n_w:n_w + n_s] = self._numeric_block(df, self._s_cols)
+        return self._complete_template_features(X)
+
+    def _feature_vector(self, row: Dict[str, Union[str, float, int, None]]) -> Tuple[np.ndarray, Dict[str, int]]:
+        """Single-row _feature_engineering_predict reading straight from a dict."""
+        def _value(name: str) -> float:
+            try:
+                return float(row.get(name))  # type: ignore
+            except (TypeError, ValueError):
+                return np.nan
+
+        n_base = len(self._w_cols) + len(self._s_cols)
+        X = np.empty((1, n_base + len(self._interactions)), dtype=np.float64)
+        X[0, :n_base] = [_value(c) for c in self._w_cols] + [_value(c) for c in self._s_cols]
+        return self._complete_template_features(X)
+
+    def _complete_template_features(self, X: np.ndarray) -> Tuple[np.ndarray, Dict[str, int]]:
+        # Median-fill the raw weather/soil block in place, then fill the interaction columns
+        n_base = len(self._w_cols) + len(self._s_cols)
+        base = X[:, :n_base]
+        medians = np.concatenate([self._w_medians, self._s_medians])
+        X[:, :n_base] = np.where(np.isfinite(base), base, medians)
+
+        col_index = self._template_index()
+        for k, (name, w_col, s_col) in enumerate(self._interactions):
+            X[:, n_base + k] = X[:, col_index[w_col]] * X[:, col_index[s_col]]
+        return X, col_index
+
+    def _template_index(self) -> Dict[str, int]:
+        if self._col_index is None:
+            names = [f"w_{c}" for c in self._w_cols] + [f"s_{c}" for c in self._s_cols]
+            names += [name for name, _, _ in self._interactions]
+            self._col_index = {c: i for i, c in enumerate(names)}
+        return self._col_index
+
     def identify_risks(self, input_row: Dict[str, Union[str, float, int]]) -> List[str]:
         """Rule-based risk identification based on common agronomic thresholds.
 
         Uses whatever keys are present; safe lookups with defaults.
         """
-        risks: List[str] = []
-
         def _get(name: str, default: float) -> float:
             try:
                 val = input_row.get(name, default)
@@ -225,18 +455,13 @@ class CropYieldPredictor:
             except Exception:
                 return default
 
-        # Weather risks
-        rainfall = _get("rainfall", _get("w_rainfall", 0.0))
-        temperature = _get("temperature", _get("w_temperature", 0.0))
-        humidity = _get("humidity", _get("w_humidity", 50.0))
-
-        # Soil risks
-        soil_moisture = _get("soil_moisture", _get("s_soil_moisture", 0.0))
-        nitrogen = _get("nitrogen", _get("s_nitrogen", 0.0))
-        phosphorus = _get("phosphorus", _get("s_phosphorus", 0.0))
-        potassium = _get("potassium", _get("s_potassium", 0.0))
-        ph = _get("ph", _get("s_ph", 7.0))
+        # Plain comparisons: for one row the jitted _risk_bitmask costs more in dispatch than it
+        # saves, so it is only used by _identify_risks_batch. Keep the thresholds in sync.
+        rainfall, temperature, humidity, soil_moisture, nitrogen, phosphorus, potassium, ph = (
+            _get(key, _get(prefixed, default)) for key, prefixed, default in _RISK_INPUTS
+        )
 
+        risks: List[str] = []
         if rainfall < 50:
             risks.append("low_rainfall")
         if temperature > 35:
@@ -253,10 +478,42 @@ class CropYieldPredictor:
             risks.append("potassium_deficit")
         if ph < 5.5 or ph > 8.0:
             risks.append("unfavorable_ph")
-
         return risks
 
+    def _identify_risks_batch(self, input_data: pd.DataFrame) -> List[List[str]]:
+        """Vectorized identify_risks over every row of a DataFrame."""
+        arr = np.empty((len(input_data), len(_RISK_INPUTS)), dtype=np.float64)
+        for j, (key, prefixed, default) in enumerate(_RISK_INPUTS):
+            col = np.full(len(input_data), default, dtype=np.float64)
+            # Raw key wins over the prefixed one, matching identify_risks
+            for name in (prefixed, key):
+                if name in input_data.columns:
+                    vals, valid = self._risk_column(input_data[name])
+                    col = np.where(valid, vals, col)
+            arr[:, j] = col
+
+        masks = _risk_bitmask(arr)
+        labels = {
+            int(m): [label for bit, label in enumerate(_RISK_LABELS) if int(m) >> bit & 1]
+            for m in np.unique(masks)
+        }
+        return [list(labels[int(m)]) for m in masks]
+
     # ---------------------------- Internal utils ------------------------- #
+    def _risk_column(self, series: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+        # Values that float() rejects (None, text) fall back to the default; NaN is kept as-is
+        if pd.api.types.is_numeric_dtype(series):
+            return series.to_numpy(dtype=np.float64), np.ones(len(series), dtype=bool)
+        vals = np.empty(len(series), dtype=np.float64)
+        valid = np.ones(len(series), dtype=bool)
+        for i, v in enumerate(series.tolist()):
+            try:
+                vals[i] = float(v)
+            except Exception:
+                vals[i] = np.nan
+                valid[i] = False
+        return vals, valid
+
     def _align_target(self, features: pd.DataFrame, yield_data: pd.DataFrame) -> pd.DataFrame:
         if "id" in yield_data.columns and features.index.name == "id":
             yd = yield_data.set_index("id")
@@ -274,41 +531,87 @@ class CropYieldPredictor:
             yd["crop"] = yd["crop"].astype(str).str.lower()
         return yd
 
-    def _build_crop_model(self, crop_name: str):
+    def _build_crop_model(self, crop_name: str, n_rows: Optional[int] = None):
         crop_name = crop_name.lower()
+        # n_jobs=1: crops already train in parallel, so estimators must not oversubscribe cores
         # Example specialization: use different estimators per crop
         if _HAS_LGBM and crop_name in {"rice", "sugarcane"}:
-            return LGBMRegressor(n_estimators=500, random_state=42)
+            return LGBMRegressor(n_estimators=500, random_state=42, n_jobs=1)
         if crop_name == "wheat":
-            return RandomForestRegressor(n_estimators=300, random_state=42)
+            return RandomForestRegressor(n_estimators=300, oob_score=True, bootstrap=True, random_state=42, n_jobs=1)
         # Fallback
         if _HAS_LGBM:
-            return LGBMRegressor(n_estimators=300, random_state=42)
-        return RandomForestRegressor(n_estimators=300, random_state=42)
-
-    def _safe_feature_row(self, row_features: pd.DataFrame, cols: List[str]) -> pd.DataFrame:
-        X = pd.DataFrame(columns=cols, index=row_features.index)
-        for c in cols:
-            if c in row_features.columns:
-                X[c] = row_features[c]
-            else:
-                X[c] = 0.0
-        return X.astype(float)
-
-    def _confidence_interval(self, pred: float, residual_std: float, z: float = 1.96) -> Tuple[float, float, float]:
-        # Basic normal-theory interval using validation RMSE as sigma
+            return LGBMRegressor(n_estimators=300, random_state=42, n_jobs=1)
+        if n_rows is not None and n_rows < _HGB_MIN_ROWS:
+            # Too few rows for boosting with leaf-size limits; the forest still fits something useful
+            return RandomForestRegressor(n_estimators=300, oob_score=True, bootstrap=True, random_state=42, n_jobs=1)
+        # Binned histogram trees: far smaller and faster to predict than a 300-tree forest
+        return HistGradientBoostingRegressor(
+            max_iter=300,
+            max_bins=255,
+            min_samples_leaf=min(20, max(1, (n_rows or _HGB_MIN_ROWS * 2) // 20)),
+            early_stopping="auto",
+            random_state=42,
+        )
+
+    def _numeric_block(self, df: pd.DataFrame, cols: List[str]) -> np.ndarray:
+        block = df.reindex(columns=cols)
+        try:
+            return block.to_numpy(dtype=np.float64)
+        except (TypeError, ValueError):
+            # Non-numeric entries become NaN and are median-filled by the caller
+            return block.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+
+    def _template_block(
+        self, X: np.ndarray, col_index: Dict[str, int], cols: List[str], model: object
+    ) -> Union[np.ndarray, pd.DataFrame]:
+        block = np.zeros((X.shape[0], len(cols)), dtype=np.float32)
+        dst = [j for j, c in enumerate(cols) if c in col_index]
+        block[:, dst] = X[:, [col_index[cols[j]] for j in dst]]
+        # Estimators fitted on a DataFrame validate column names at predict time
+        if hasattr(model, "feature_names_in_"):
+            return pd.DataFrame(block, columns=cols, copy=False)
+        return block
+
+    def _safe_feature_row(
+        self, row_features: pd.DataFrame, cols: List[str], model: object
+    ) -> Union[np.ndarray, pd.DataFrame]:
+        # Missing training columns are zero-filled; float32 is what the tree models consume anyway
+        block = row_features.reindex(columns=cols, fill_value=0.0).astype(np.float32, copy=False)
+        # Estimators fitted on NumPy arrays warn when given column names
+        return block if hasattr(model, "feature_names_in_") else block.to_numpy()
+
+    def _confidence_interval(
+        self, pred: np.ndarray, residual_std: float, z: float = 1.96
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Basic normal-theory interval using validation RMSE as sigma, elementwise over predictions
         interval_radius = z * float(max(residual_std, 1e-6))
-        low = float(pred - interval_radius)
-        high = float(pred + interval_radius)
+        low = pred - interval_radius
+        high = pred + interval_radius
         # Confidence score inversely proportional to relative width
-        denom = abs(pred) + 1e-6
+        denom = np.abs(pred) + 1e-6
         relative_width = (high - low) / denom
-        score = float(max(0.0, min(1.0, 1.0 / (1.0 + relative_width))))
+        score = np.clip(1.0 / (1.0 + relative_width), 0.0, 1.0)
         return low, high, score
 
     # --------------------------- Persistence API ------------------------- #
-    def save(self, path: str) -> None:
-        """Persist trained models and metadata to disk using joblib."""
+    def save(self, path: str, mmap: bool = False) -> None:
+        """Persist trained models and metadata to disk using joblib.
+
+        Metadata goes to `path`; each crop's estimator is written to its own file next to it so
+        `load` can bring in only the crops it needs. Estimators are lz4-compressed (zlib when lz4
+        is unavailable) unless `mmap=True`, which keeps them uncompressed so `load` can
+        memory-map their arrays instead of copying them into RAM.
+        """
+        compress = 0 if mmap else (("lz4", 3) if _HAS_LZ4 else ("zlib", 3))
+        stem, ext = os.path.splitext(path)
+        estimator_files: Dict[str, str] = {}
+        for i, (crop, m) in enumerate(self.models.items()):
+            safe = re.sub(r"[^a-z0-9_-]+", "_", crop)
+            est_path = f"{stem}.{i}.{safe}{ext or '.joblib'}"
+            joblib.dump(m.model, est_path, compress=compress, protocol=pickle.HIGHEST_PROTOCOL)
+            estimator_files[crop] = os.path.basename(est_path)
+
         state = {
             "target_name": self.target_name,
             "models": {
@@ -321,32 +624,52 @@ class CropYieldPredictor:
                 }
                 for crop, m in self.models.items()
             },
+            "feature_template": None if self._w_cols is None else {
+                "w_cols": self._w_cols,
+                "s_cols": self._s_cols,
+                "w_medians": self._w_medians.tolist(),
+                "s_medians": self._s_medians.tolist(),
+                "interactions": self._interactions,
+            },
         }
-        # Save estimators separately to keep file size manageable and avoid pickling issues
-        payload = {"state": state, "estimators": {}}
-        for crop, m in self.models.items():
-            payload["estimators"][crop] = m.model
-        joblib.dump(payload, path)
+        payload = {"state": state, "estimator_files": estimator_files, "mmap": mmap}
+        joblib.dump(payload, path, protocol=pickle.HIGHEST_PROTOCOL)
 
     @classmethod
-    def load(cls, path: str) -> "CropYieldPredictor":
-        """Load a previously saved predictor from disk."""
+    def load(cls, path: str, crops: Optional[List[str]] = None) -> "CropYieldPredictor":
+        """Load a previously saved predictor from disk, optionally restricted to `crops`."""
         payload = joblib.load(path)
         state = payload["state"]
-        estimators = payload["estimators"]
+        wanted = None if crops is None else {str(c).lower() for c in crops}
 
         obj = cls(target_name=state.get("target_name", "yield"))
         models: Dict[str, TrainedCropModel] = {}
         for crop, meta in state["models"].items():
+            if wanted is not None and crop not in wanted:
+                continue
+            if "estimators" in payload:
+                # Single-file layout written by older versions
+                estimator = payload["estimators"][crop]
+            else:
+                est_path = os.path.join(os.path.dirname(path), payload["estimator_files"][crop])
+                estimator = joblib.load(est_path, mmap_mode="r" if payload.get("mmap") else None)
             models[crop] = TrainedCropModel(
                 model_name=meta["model_name"],
-                model=estimators[crop],
+                model=estimator,
                 feature_columns=list(meta["feature_columns"]),
                 target_name=meta["target_name"],
                 residual_std=float(meta["residual_std"]),
                 training_rows=int(meta["training_rows"]),
             )
         obj.models = models
+        template = state.get("feature_template")
+        if template:
+            obj._w_cols = list(template["w_cols"])
+            obj._s_cols = list(template["s_cols"])
+            obj._w_medians = np.asarray(template["w_medians"], dtype=np.float64)
+            obj._s_medians = np.asarray(template["s_medians"], dtype=np.float64)
+            obj._interactions = [tuple(t) for t in template["interactions"]]  # type: ignore[misc]
+        obj.state_version = next(_STATE_VERSIONS)
         return obj
 
 
@@ -19,6 +19,40 @@ except Exception:  # pragma: no cover
     _HAS_TF = False
 
 
+_TREATMENTS = {
+    'brown_planthopper': 'Apply buprofezin or imidacloprid; drain excess water.',
+    'stem_borer': 'Use tricho cards; apply chlorantraniliprole as per label.',
+    'fall_armyworm': 'Spinosad or emamectin benzoate; monitor larvae early.',
+    'aphid': 'Neem oil sprays; if severe, imidacloprid low dose.',
+    'whitefly': 'Yellow sticky traps; rotate insecticides to avoid resistance.',
+    'leaf_folder': 'Pheromone traps; avoid excessive nitrogen fertilization.',
+    'thrips': 'Blue sticky traps; spinosad; maintain field sanitation.',
+    'mites': 'Use acaricides judiciously; avoid dust and water stress.',
+    'cutworm': 'Soil application of chlorpyrifos bait; field sanitation.',
+    'bollworm': 'Bt formulations; emamectin; timely picking and sanitation.',
+}
+_DEFAULT_TREATMENT = 'Follow integrated pest management (IPM) guidelines.'
+
+_COMMON_PREVENTION = [
+    'Rotate crops and avoid monoculture.',
+    'Remove and destroy infested plant parts.',
+    'Use resistant varieties where available.',
+    'Maintain field hygiene and balanced fertilization.',
+]
+_SPECIFIC_PREVENTION = {
+    'brown_planthopper': ['Avoid excessive nitrogen; maintain proper plant spacing.'],
+    'stem_borer': ['Clip and destroy dead hearts; use light traps.'],
+    'fall_armyworm': ['Scout whorls regularly; conserve natural enemies.'],
+    'aphid': ['Avoid water stress; encourage ladybird beetles.'],
+    'whitefly': ['Weed control to remove alternate hosts; reflective mulches.'],
+    'leaf_folder': ['Avoid late planting; maintain proper irrigation.'],
+    'thrips': ['Prevent dust; ensure adequate irrigation.'],
+    'mites': ['Avoid use of broad-spectrum insecticides that kill predators.'],
+    'cutworm': ['Deep ploughing to expose larvae; flood fields if appropriate.'],
+    'bollworm': ['Timely sowing; remove crop residues after harvest.'],
+}
+
+
 class PestDetector:
     def __init__(self, model_path: Optional[str] = None, input_size: int = 224):
         self.input_size = int(input_size)
@@ -26,11 +60,26 @@ class PestDetector:
             'brown_planthopper', 'stem_borer', 'fall_armyworm', 'aphid', 'whitefly',
             'leaf_folder', 'thrips', 'mites', 'cutworm', 'bollworm'
         ]
+        # Advice per label index so a prediction only needs one argmax
+        self._treatment_by_idx = tuple(_TREATMENTS.get(label, _DEFAULT_TREATMENT) for label in self.labels)
+        self._prevention_by_idx = tuple(
+            tuple(_SPECIFIC_PREVENTION.get(label, []) + _COMMON_PREVENTION) for label in self.labels
+        )
+        self._interpreter = None
+        self._tflite_input: Optional[dict] = None
+        self._tflite_output: Optional[dict] = None
         self.model = self.load_pest_model(model_path)
+        self._infer = self._build_inference_fn(self.model)
 
     def load_pest_model(self, model_path: Optional[str] = None):
         if not _HAS_TF:
             return None
+        # Prefer an int8 TFLite artifact (the path itself or a sibling .tflite) over the Keras model
+        if model_path:
+            tflite_path = model_path if model_path.endswith('.tflite') else os.path.splitext(model_path)[0] + '.tflite'
+            if os.path.exists(tflite_path):
+                self._interpreter = self._load_tflite(tflite_path)
+                return None
         if model_path and os.path.exists(model_path):
             try:
                 return tf.keras.models.load_model(model_path)
@@ -43,79 +92,121 @@ class PestDetector:
         model = Model(inputs=base.input, outputs=outputs)
         return model
 
+    def convert_to_tflite_int8(self, representative_images: List[np.ndarray], output_path: str) -> str:
+        """Quantize the Keras model to full int8 TFLite and switch inference to it.
+
+        representative_images: BGR images (as read by cv2) used to calibrate activation ranges.
+        """
+        if not _HAS_TF or self.model is None:
+            raise RuntimeError('A TensorFlow Keras model is required for TFLite conversion')
+
+        def representative_dataset():
+            for image in representative_images:
+                yield [self.preprocess_image(image)]
+
+        converter = tf.lite.TFLiteConverter.from_keras_model(self.model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        # Calibrated on [0, 1] floats; _run_tflite quantizes with the scale/zero point the converter picks
+        converter.inference_input_type = tf.uint8
+        with open(output_path, 'wb') as f:
+            f.write(converter.convert())
+        self._interpreter = self._load_tflite(output_path)
+        return output_path
+
+    def _load_tflite(self, path: str):
+        interpreter = tf.lite.Interpreter(model_path=path, num_threads=os.cpu_count())
+        interpreter.allocate_tensors()
+        # Tensor details don't change after allocation; look them up once
+        self._tflite_input = interpreter.get_input_details()[0]
+        self._tflite_output = interpreter.get_output_details()[0]
+        return interpreter
+
+    def _run_tflite(self, image: np.ndarray) -> np.ndarray:
+        inp, out = self._tflite_input, self._tflite_output
+        x = self.preprocess_image(image)
+        if inp['dtype'] != np.float32:
+            # Quantize the [0, 1] input with the model's own parameters (a float model takes x as is)
+            scale, zero_point = inp['quantization']
+            if scale:
+                x = np.round(x / scale + zero_point)
+            info = np.iinfo(inp['dtype'])
+            x = np.clip(x, info.min, info.max).astype(inp['dtype'])
+        self._interpreter.set_tensor(inp['index'], x)
+        self._interpreter.invoke()
+        preds = self._interpreter.get_tensor(out['index'])
+        scale, zero_point = out['quantization']
+        if scale and out['dtype'] != np.float32:
+            preds = (preds.astype(np.float32) - zero_point) * scale
+        return preds
+
+    def _build_inference_fn(self, model):
+        if not _HAS_TF or model is None:
+            return None
+        # Direct XLA-compiled call avoids Model.predict's per-call setup; trace once at init
+        infer = tf.function(lambda x: model(x, training=False), jit_compile=True)
+        infer(tf.zeros((1, self.input_size, self.input_size, 3), dtype=tf.float32))
+        return infer
+
     def preprocess_image(self, image: np.ndarray) -> np.ndarray:
         if image is None:
             raise ValueError('Could not read image')
-        img = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        img = cv2.resize(img, (self.input_size, self.input_size))
-        img = img.astype('float32') / 255.0
-        img = np.expand_dims(img, axis=0)
-        return img
+        # Resize first (usually a downsample) so the colour swap and scaling touch fewer pixels;
+        # both are per-channel, so the order does not change the result.
+        img = cv2.resize(image, (self.input_size, self.input_size))
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        out = np.empty((1, self.input_size, self.input_size, 3), dtype=np.float32)
+        np.divide(img, np.float32(255.0), out=out[0], dtype=np.float32)
+        return out
 
     def detect_pests(self, image_path: str) -> dict:
         image = cv2.imread(image_path)
-        processed_image = self.preprocess_image(image)
+        if image is None:
+            raise ValueError('Could not read image')
 
-        if _HAS_TF and self.model is not None:
-            preds = self.model.predict(processed_image)
+        if self._interpreter is not None:
+            preds = self._run_tflite(image)
+        elif _HAS_TF and self._infer is not None:
+            preds = self._infer(tf.convert_to_tensor(self.preprocess_image(image))).numpy()
         else:
             preds = np.random.dirichlet(alpha=np.ones(len(self.labels)), size=1)
 
+        flat = np.asarray(preds).reshape(-1)
+        idx = int(flat.argmax())
         return {
-            'pest_type': self.decode_prediction(preds),
-            'severity': self.calculate_severity(preds),
-            'treatment_plan': self.generate_treatment(preds),
-            'prevention_tips': self.get_prevention_advice(preds),
+            'pest_type': self.pest_type_for(idx),
+            'severity': self.severity_for(float(flat[idx])),
+            'treatment_plan': self.treatment_for(idx),
+            'prevention_tips': self.prevention_for(idx),
         }
 
-    def decode_prediction(self, preds: np.ndarray) -> str:
-        idx = int(np.argmax(preds))
+    # Index/confidence-keyed lookups; detect_pests takes the argmax once and reuses it
+    def pest_type_for(self, idx: int) -> str:
         return self.labels[idx]
 
-    def calculate_severity(self, preds: np.ndarray) -> str:
-        confidence = float(np.max(preds))
+    def severity_for(self, confidence: float) -> str:
         if confidence >= 0.8:
             return 'high'
         if confidence >= 0.5:
             return 'medium'
         return 'low'
 
-    def generate_treatment(self, preds: np.ndarray) -> str:
-        pest = self.decode_prediction(preds)
-        mapping = {
-            'brown_planthopper': 'Apply buprofezin or imidacloprid; drain excess water.',
-            'stem_borer': 'Use tricho cards; apply chlorantraniliprole as per label.',
-            'fall_armyworm': 'Spinosad or emamectin benzoate; monitor larvae early.',
-            'aphid': 'Neem oil sprays; if severe, imidacloprid low dose.',
-            'whitefly': 'Yellow sticky traps; rotate insecticides to avoid resistance.',
-            'leaf_folder': 'Pheromone traps; avoid excessive nitrogen fertilization.',
-            'thrips': 'Blue sticky traps; spinosad; maintain field sanitation.',
-            'mites': 'Use acaricides judiciously; avoid dust and water stress.',
-            'cutworm': 'Soil application of chlorpyrifos bait; field sanitation.',
-            'bollworm': 'Bt formulations; emamectin; timely picking and sanitation.',
-        }
-        return mapping.get(pest, 'Follow integrated pest management (IPM) guidelines.')
+    def treatment_for(self, idx: int) -> str:
+        return self._treatment_by_idx[idx]
 
-    def get_prevention_advice(self, preds: np.ndarray) -> List[str]:
-        pest = self.decode_prediction(preds)
-        common = [
-            'Rotate crops and avoid monoculture.',
-            'Remove and destroy infested plant parts.',
-            'Use resistant varieties where available.',
-            'Maintain field hygiene and balanced fertilization.',
-        ]
-        specific = {
-            'brown_planthopper': ['Avoid excessive nitrogen; maintain proper plant spacing.'],
-            'stem_borer': ['Clip and destroy dead hearts; use light traps.'],
-            'fall_armyworm': ['Scout whorls regularly; conserve natural enemies.'],
-            'aphid': ['Avoid water stress; encourage ladybird beetles.'],
-            'whitefly': ['Weed control to remove alternate hosts; reflective mulches.'],
-            'leaf_folder': ['Avoid late planting; maintain proper irrigation.'],
-            'thrips': ['Prevent dust; ensure adequate irrigation.'],
-            'mites': ['Avoid use of broad-spectrum insecticides that kill predators.'],
-            'cutworm': ['Deep ploughing to expose larvae; flood fields if appropriate.'],
-            'bollworm': ['Timely sowing; remove crop residues after harvest.'],
-        }
-        return specific.get(pest, []) + common
+    def prevention_for(self, idx: int) -> List[str]:
+        return list(self._prevention_by_idx[idx])
 
+    # Prediction-array wrappers kept for existing callers
+    def decode_prediction(self, preds: np.ndarray) -> str:
+        return self.pest_type_for(int(np.argmax(preds)))
+
+    def calculate_severity(self, preds: np.ndarray) -> str:
+        return self.severity_for(float(np.max(preds)))
 
+    def generate_treatment(self, preds: np.ndarray) -> str:
+        return self.treatment_for(int(np.argmax(preds)))
+
+    def get_prevention_advice(self, preds: np.ndarray) -> List[str]:
+        return self.prevention_for(int(np.argmax(preds)))
@@ -1,5 +1,43 @@
+from types import SimpleNamespace
 from typing import Any, Dict, Optional, Tuple
 
+import numpy as np
+import pandas as pd
+
+
+_IRRIGATION_SCHEDULES = ('Irrigate today (deficit)', 'Irrigate in 2 days', 'No irrigation needed today')
+_NUTRIENT_STEPS = (
+    {'nutrient': 'N', 'rate_kg_ha': 80, 'advice': 'Apply urea in splits'},
+    {'nutrient': 'P', 'rate_kg_ha': 40, 'advice': 'Apply DAP/SSP as basal'},
+    {'nutrient': 'K', 'rate_kg_ha': 40, 'advice': 'Apply MOP early'},
+)
+_BALANCED_STEP = {'nutrient': 'balanced', 'rate_kg_ha': 0, 'advice': 'Maintain current schedule'}
+# Plan for every N/P/K deficit bitmask (bit 0 = N, 1 = P, 2 = K); batch rows get their own copies
+_NUTRIENT_PLANS: Tuple[Tuple[Dict[str, Any], ...], ...] = tuple(
+    tuple(step for bit, step in enumerate(_NUTRIENT_STEPS) if mask & (1 << bit)) or (_BALANCED_STEP,)
+    for mask in range(8)
+)
+_CLIMATE_RISKS: Tuple[Tuple[str, ...], ...] = ((), ('low_rainfall',), ('heat_stress',), ('low_rainfall', 'heat_stress'))
+
+# Field keys read by the recommendation rules, with the value used when a key is absent
+_EXPECTED_KEYS = (
+    'soil_moisture', 'rainfall_mm', 'et0_mm', 'nitrogen', 'phosphorus', 'potassium',
+    'temperature', 'days_after_sowing', 'month', 'crop',
+)
+_DEFAULTS: Dict[str, Any] = {
+    'soil_moisture': 25, 'rainfall_mm': 0, 'et0_mm': 4, 'nitrogen': 30, 'phosphorus': 20, 'potassium': 20,
+    'temperature': 30, 'days_after_sowing': 60, 'month': 7, 'crop': 'rice',
+}
+_CONVERTERS: Dict[str, Any] = {'days_after_sowing': int, 'month': int, 'crop': lambda v: str(v).lower()}
+
+
+def _unpack(field_data: Dict[str, Any], keys: Tuple[str, ...] = _EXPECTED_KEYS) -> SimpleNamespace:
+    """Read and convert `keys` in one pass (numbers to float unless listed in _CONVERTERS)."""
+    get = field_data.get
+    return SimpleNamespace(**{
+        key: _CONVERTERS.get(key, float)(get(key, _DEFAULTS[key])) for key in keys
+    })
+
 
 class PrecisionAgricultureEngine:
     def __init__(self, translator: Optional[Any] = None, terms: Optional[Dict[str, Dict[str, str]]] = None):
@@ -8,84 +46,144 @@ class PrecisionAgricultureEngine:
         self.terms = terms or {}
 
     def generate_recommendations(self, field_data: Dict[str, Any], language: Optional[str] = None) -> Tuple[Dict[str, Any], str]:
+        f = _unpack(field_data)
         recommendations = {
-            'irrigation': self.optimize_irrigation_schedule(field_data),
-            'fertilization': self.calculate_nutrient_requirements(field_data),
-            'planting': self.suggest_optimal_planting_dates(field_data),
-            'harvest': self.predict_harvest_timing(field_data),
-            'market_price': self.predict_market_prices(field_data),
-            'risk_assessment': self.assess_climate_risks(field_data)
+            'irrigation': self._irrigation_schedule(f),
+            'fertilization': self._nutrient_requirements(f),
+            'planting': self._planting_dates(f),
+            'harvest': self._harvest_timing(f),
+            'market_price': self._market_prices(f),
+            'risk_assessment': self._climate_risks(f)
         }
 
         insights = self.generate_farmer_friendly_insights(recommendations, language)
         return recommendations, insights
 
+    def generate_recommendations_batch(self, field_df: pd.DataFrame) -> pd.DataFrame:
+        """Vectorized generate_recommendations for many fields at once.
+
+        Returns one row per field with the values of the six single-field recommendations as
+        flat columns. Missing columns or values fall back to the single-field defaults.
+        """
+        def num(col: str) -> np.ndarray:
+            default = float(_DEFAULTS[col])
+            if col not in field_df:
+                return np.full(len(field_df), default)
+            values = pd.to_numeric(field_df[col], errors='coerce').to_numpy(dtype=np.float64)
+            return np.where(np.isnan(values), default, values)
+
+        sm = num('soil_moisture')
+        rain = num('rainfall_mm')
+        temp = num('temperature')
+        if 'crop' in field_df:
+            crop = field_df['crop'].fillna(_DEFAULTS['crop']).astype(str).str.lower().to_numpy()
+        else:
+            crop = np.full(len(field_df), _DEFAULTS['crop'], dtype=object)
+        is_rice = crop == 'rice'
+        is_wheat = crop == 'wheat'
+
+        schedule_idx = np.where(sm < 15, 0, np.where((sm < 25) & (rain < 5), 1, 2))
+        nutrient_mask = (
+            (num('nitrogen') < 20).astype(np.int64)
+            | ((num('phosphorus') < 15) << 1)
+            | ((num('potassium') < 15) << 2)
+        )
+        risk_mask = (rain < 50).astype(np.int64) | ((temp > 35) << 1)
+        typical_duration = np.where(is_rice, 120, np.where(is_wheat, 140, 100))
+        days_after_sowing = np.trunc(num('days_after_sowing')).astype(np.int64)
+
+        return pd.DataFrame({
+            'crop': crop,
+            'irrigation_status': np.select([sm < 15, sm < 25], ['deficit', 'moderate'], 'adequate'),
+            'irrigation_schedule': np.asarray(_IRRIGATION_SCHEDULES, dtype=object)[schedule_idx],
+            'et0_mm': num('et0_mm'),
+            # A single deficit still counts as 'balanced', as in calculate_nutrient_requirements
+            'nutrient_status': np.where(np.isin(nutrient_mask, (3, 5, 6, 7)), 'deficit', 'balanced'),
+            'nutrient_plan': [[dict(step) for step in _NUTRIENT_PLANS[m]] for m in nutrient_mask],
+            'planting_window': np.where(is_rice, 'June-July', np.where(is_wheat, 'November', 'Seasonal window varies')),
+            'current_month': np.trunc(num('month')).astype(np.int64),
+            'harvest_remaining_days': np.maximum(0, typical_duration - days_after_sowing),
+            'typical_duration_days': typical_duration,
+            'msp_like_price_inr_qtl': np.where(is_rice, 2000, np.where(is_wheat, 2200, 1800)),
+            'market_trend': 'stable',
+            'climate_risks': [list(_CLIMATE_RISKS[m]) for m in risk_mask],
+            'risk_score': 100 - 20 * ((risk_mask & 1) + (risk_mask >> 1)),
+        }, index=field_df.index)
+
     def optimize_irrigation_schedule(self, field_data: Dict[str, Any]) -> Dict[str, Any]:
-        soil_moisture = float(field_data.get('soil_moisture', 25))
-        rainfall_mm = float(field_data.get('rainfall_mm', 0))
-        et0 = float(field_data.get('et0_mm', 4))
-        crop = str(field_data.get('crop', 'rice')).lower()
+        return self._irrigation_schedule(_unpack(field_data, ('soil_moisture', 'rainfall_mm', 'et0_mm', 'crop')))
+
+    def calculate_nutrient_requirements(self, field_data: Dict[str, Any]) -> Dict[str, Any]:
+        return self._nutrient_requirements(_unpack(field_data, ('nitrogen', 'phosphorus', 'potassium')))
+
+    def suggest_optimal_planting_dates(self, field_data: Dict[str, Any]) -> Dict[str, Any]:
+        return self._planting_dates(_unpack(field_data, ('crop', 'month')))
+
+    def predict_harvest_timing(self, field_data: Dict[str, Any]) -> Dict[str, Any]:
+        return self._harvest_timing(_unpack(field_data, ('crop', 'days_after_sowing')))
+
+    def predict_market_prices(self, field_data: Dict[str, Any]) -> Dict[str, Any]:
+        return self._market_prices(_unpack(field_data, ('crop',)))
 
+    def assess_climate_risks(self, field_data: Dict[str, Any]) -> Dict[str, Any]:
+        return self._climate_risks(_unpack(field_data, ('rainfall_mm', 'temperature')))
+
+    # Rules over an unpacked field (see _unpack); the wrappers above convert only the keys each rule reads
+    def _irrigation_schedule(self, f: SimpleNamespace) -> Dict[str, Any]:
+        soil_moisture = f.soil_moisture
         if soil_moisture < 15:
             schedule = 'Irrigate today (deficit)'
-        elif soil_moisture < 25 and rainfall_mm < 5:
+        elif soil_moisture < 25 and f.rainfall_mm < 5:
             schedule = 'Irrigate in 2 days'
         else:
             schedule = 'No irrigation needed today'
 
         return {
-            'crop': crop,
+            'crop': f.crop,
             'status': 'deficit' if soil_moisture < 15 else 'moderate' if soil_moisture < 25 else 'adequate',
             'schedule': schedule,
-            'et0_mm': et0,
+            'et0_mm': f.et0_mm,
         }
 
-    def calculate_nutrient_requirements(self, field_data: Dict[str, Any]) -> Dict[str, Any]:
-        n = float(field_data.get('nitrogen', 30))
-        p = float(field_data.get('phosphorus', 20))
-        k = float(field_data.get('potassium', 20))
+    def _nutrient_requirements(self, f: SimpleNamespace) -> Dict[str, Any]:
         plan = []
-        if n < 20:
+        if f.nitrogen < 20:
             plan.append({'nutrient': 'N', 'rate_kg_ha': 80, 'advice': 'Apply urea in splits'})
-        if p < 15:
+        if f.phosphorus < 15:
             plan.append({'nutrient': 'P', 'rate_kg_ha': 40, 'advice': 'Apply DAP/SSP as basal'})
-        if k < 15:
+        if f.potassium < 15:
             plan.append({'nutrient': 'K', 'rate_kg_ha': 40, 'advice': 'Apply MOP early'})
         if not plan:
             plan.append({'nutrient': 'balanced', 'rate_kg_ha': 0, 'advice': 'Maintain current schedule'})
         return {'status': 'deficit' if len(plan) > 1 else 'balanced', 'recommendations': plan}
 
-    def suggest_optimal_planting_dates(self, field_data: Dict[str, Any]) -> Dict[str, Any]:
-        crop = str(field_data.get('crop', 'rice')).lower()
-        month = int(field_data.get('month', 7))
+    def _planting_dates(self, f: SimpleNamespace) -> Dict[str, Any]:
+        crop = f.crop
         if crop == 'rice':
             window = 'June-July'
         elif crop == 'wheat':
             window = 'November'
         else:
             window = 'Seasonal window varies'
-        return {'crop': crop, 'recommended_window': window, 'current_month': month}
+        return {'crop': crop, 'recommended_window': window, 'current_month': f.month}
 
-    def predict_harvest_timing(self, field_data: Dict[str, Any]) -> Dict[str, Any]:
-        crop = str(field_data.get('crop', 'rice')).lower()
-        days_after_sowing = int(field_data.get('days_after_sowing', 60))
+    def _harvest_timing(self, f: SimpleNamespace) -> Dict[str, Any]:
+        crop = f.crop
         typical_duration = 120 if crop == 'rice' else 140 if crop == 'wheat' else 100
-        remaining = max(0, typical_duration - days_after_sowing)
+        remaining = max(0, typical_duration - f.days_after_sowing)
         return {'crop': crop, 'remaining_days': remaining, 'typical_duration_days': typical_duration}
 
-    def predict_market_prices(self, field_data: Dict[str, Any]) -> Dict[str, Any]:
-        crop = str(field_data.get('crop', 'rice')).lower()
+    def _market_prices(self, f: SimpleNamespace) -> Dict[str, Any]:
+        crop = f.crop
         base_price = 2000 if crop == 'rice' else 2200 if crop == 'wheat' else 1800
         trend = 'stable'
         return {'crop': crop, 'msp_like_price_inr_qtl': base_price, 'trend': trend}
 
-    def assess_climate_risks(self, field_data: Dict[str, Any]) -> Dict[str, Any]:
-        rainfall = float(field_data.get('rainfall_mm', 0))
-        temp = float(field_data.get('temperature', 30))
+    def _climate_risks(self, f: SimpleNamespace) -> Dict[str, Any]:
         risks = []
-        if rainfall < 50:
+        if f.rainfall_mm < 50:
             risks.append('low_rainfall')
-        if temp > 35:
+        if f.temperature > 35:
             risks.append('heat_stress')
         return {'risks': risks, 'score': max(0, 100 - (len(risks) * 20))}
 
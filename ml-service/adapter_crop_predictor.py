@@ -1,18 +1,14 @@
 from pathlib import Path
-import importlib.util
+import sys
 
+# ml-models isn't an importable package name, so put the directory itself on the path; the
+# module is then imported once and shared through sys.modules (numba's kernel cache needs that too).
+_MODELS_DIR = str(Path(__file__).resolve().parents[1] / "ml-models")
+if _MODELS_DIR not in sys.path:
+    sys.path.insert(0, _MODELS_DIR)
 
-def _load_predictor_cls():
-    root = Path(__file__).resolve().parents[1]
-    path = root / "ml-models" / "crop_predictor.py"
-    spec = importlib.util.spec_from_file_location("crop_predictor", str(path))
-    module = importlib.util.module_from_spec(spec)
-    assert spec and spec.loader
-    spec.loader.exec_module(module)  # type: ignore
-    return module.CropYieldPredictor
+from crop_predictor import CropYieldPredictor as _PREDICTOR_CLS  # noqa: E402
 
-
-_PREDICTOR_CLS = _load_predictor_cls()
 _SINGLETON = None
 
 
@@ -21,5 +17,3 @@ def get_predictor():
     if _SINGLETON is None:
         _SINGLETON = _PREDICTOR_CLS()
     return _SINGLETON
-
-
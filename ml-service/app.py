@@ -1,3 +1,8 @@
+import copy
+import json
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
 from fastapi import FastAPI
 from pydantic import BaseModel
 from typing import Any, Dict
@@ -17,7 +22,23 @@ class InputRow(BaseModel):
     ph: float | None = None
 
 
-app = FastAPI(title="Krishi AI ML Service")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the predictor and run one prediction before serving, so the first request
+    # doesn't pay for imports, JIT compilation and estimator warm-up.
+    predictor = get_predictor()
+    predictor.predict_from_dict({"crop": next(iter(predictor.models), "rice")})
+    yield
+
+
+app = FastAPI(title="Krishi AI ML Service", lifespan=lifespan)
+
+
+@lru_cache(maxsize=1024)
+def _predict_cached(state_version: int, row_json: str) -> Any:
+    # Repeat queries for the same field skip the model entirely; state_version keys out
+    # answers from a predictor that has since been retrained or swapped
+    return get_predictor().predict_from_dict(json.loads(row_json))
 
 
 @app.get("/health")
@@ -27,11 +48,7 @@ def health():
 
 @app.post("/predict")
 def predict(row: InputRow) -> Dict[str, Any]:
-    import pandas as pd
-
     predictor = get_predictor()
-    df = pd.DataFrame([row.model_dump()])
-    result = predictor.predict_with_confidence(df)
-    return {"result": result}
-
-
+    result = _predict_cached(predictor.state_version, json.dumps(row.model_dump(), sort_keys=True))
+    # Cached results are shared between requests; hand each caller its own copy
+    return {"result": copy.deepcopy(result)}